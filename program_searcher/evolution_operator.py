@@ -1,19 +1,29 @@
+import itertools
+import math
 import random
 from abc import ABC, abstractmethod
-from collections import deque
 
-from typing_extensions import Dict, override
+from typing_extensions import Dict, List, override
 
 from program_searcher.mutation_strategy import MutationStrategy
 from program_searcher.program_model import Program
 
 
 class EvolutionOperator(ABC):
+    def __init__(self):
+        self._strategies_source: Dict[MutationStrategy, float] = None
+        self._strategies: List[MutationStrategy] = []
+        self._weights: List[float] = []
+        self._cum_weights: List[float] = []
+        self._single_strategy: MutationStrategy = None
+        self._uniform_weights = False
+        self._oldest_index = 0
+
     @abstractmethod
     def apply(
         self,
-        population: deque[Program],
-        fitnesses: Dict[Program, float],
+        population: List[Program],
+        fitnesses: Dict[int, float],
         mutation_strategies: Dict[MutationStrategy, float],
     ):
         """
@@ -21,15 +31,63 @@ class EvolutionOperator(ABC):
 
         Parameters
         ----------
-        population : deque[Program]
+        population : List[Program]
             Current population of programs.
-        fitnesses : Dict[Program, float]
-            Mapping from program to its fitness.
+        fitnesses : Dict[int, float]
+            Mapping from ``id(program)`` to its fitness.
         mutation_strategies : Dict[MutationStrategy, float]
             Per-program mutation strategies with associated probabilities.
 
         """
-        raise NotImplementedError
+        pass
+
+    def _choose_strategies(
+        self, mutation_strategies: Dict[MutationStrategy, float], k: int
+    ) -> List[MutationStrategy]:
+        """
+        Draws ``k`` mutation strategies according to their probabilities.
+
+        Strategies, weights and cumulative weights are cached per
+        ``mutation_strategies`` mapping, so they are built once per search
+        instead of on every call. The mapping is expected not to be modified
+        in-place while it is being used. A single strategy is returned without
+        drawing, and equal weights skip the weighted draw.
+        """
+        if mutation_strategies is not self._strategies_source:
+            self._strategies_source = mutation_strategies
+            self._strategies = list(mutation_strategies.keys())
+            self._weights = list(mutation_strategies.values())
+            self._cum_weights = list(itertools.accumulate(self._weights))
+            self._single_strategy = (
+                self._strategies[0] if len(self._strategies) == 1 else None
+            )
+            self._uniform_weights = len(set(self._weights)) == 1
+
+        if self._single_strategy is not None:
+            return [self._single_strategy] * k
+        if self._uniform_weights:
+            return random.choices(self._strategies, k=k)
+
+        return random.choices(self._strategies, cum_weights=self._cum_weights, k=k)
+
+    def _replace_oldest(
+        self,
+        population: List[Program],
+        fitnesses: Dict[int, float],
+        program: Program,
+    ) -> int:
+        """
+        Replaces the oldest program in the population with ``program``.
+
+        The population list is treated as a ring buffer: the slot of the oldest
+        program is tracked by index, so replacing it is O(1) and the population
+        keeps O(1) random access for sampling. Returns the replaced index.
+        """
+        oldest_index = self._oldest_index % len(population)
+        fitnesses.pop(id(population[oldest_index]), None)
+        population[oldest_index] = program
+        self._oldest_index = oldest_index + 1
+        return oldest_index
 
 
 class TournamentSelectionOperator(EvolutionOperator, ABC):
@@ -48,29 +106,121 @@ class TournamentSelectionOperator(EvolutionOperator, ABC):
     """
 
     def __init__(self, tournament_size: int):
+        super().__init__()
         self.tournament_size = tournament_size
 
     @override
     def apply(
         self,
-        population: deque[Program],
-        fitnesses: Dict[Program, float],
+        population: List[Program],
+        fitnesses: Dict[int, float],
         mutation_strategies: Dict[MutationStrategy, float],
     ):
         tournament_programs = random.choices(population, k=self.tournament_size)
-        best_program = max(tournament_programs, key=lambda prog: fitnesses[prog])
+        best_program = max(tournament_programs, key=lambda prog: fitnesses[id(prog)])
         tournament_winner = best_program.copy()
 
-        program = population.popleft()
-        fitnesses.pop(program)
+        chosen_strategy = self._choose_strategies(mutation_strategies, k=1)[0]
+        chosen_strategy.mutate(tournament_winner)
 
-        strategies = list(mutation_strategies.keys())
-        weights = list(mutation_strategies.values())
+        self._replace_oldest(population, fitnesses, tournament_winner)
 
-        chosen_strategy = random.choices(strategies, weights=weights, k=1)[0]
-        chosen_strategy.mutate(tournament_winner)
 
-        population.append(tournament_winner)
+class FitnessProportionateSelectionOperator(EvolutionOperator):
+    """
+    Evolution operator that applies fitness-proportionate (roulette wheel)
+    selection followed by mutation.
+
+    Fitnesses are shifted by the population minimum at the time the weights
+    were last rebuilt so that they are non-negative, and used as selection
+    weights; non-finite fitnesses (NaN, inf) get weight 0. Parents are drawn from a Fenwick tree over these
+    weights that is kept between steps: as long as the population was only
+    changed by this operator, the children created in the previous step are
+    the only slots that get new weights, so a step costs O(log N) per child
+    instead of rebuilding the weights for all N programs. The tree is rebuilt
+    when the population was modified elsewhere or a child scores below the
+    minimum the weights are shifted by.
+
+    Each mutated child replaces the oldest program in the population (FIFO
+    style); the replaced slot gets weight 0 until the child is evaluated, so
+    children created in the same step are not selected as parents. If all
+    weights are 0, parents are drawn uniformly.
+
+    Attributes
+    ----------
+    offspring_count : int
+        The number of children produced per step. Defaults to 1.
+    """
+
+    def __init__(self, offspring_count: int = 1):
+        super().__init__()
+        self.offspring_count = offspring_count
+        self._tree: _FenwickTree = None
+        self._tree_population: List[Program] = []
+        self._weight_offset = 0.0
+        self._children_indices: List[int] = []
+
+    @override
+    def apply(
+        self,
+        population: List[Program],
+        fitnesses: Dict[int, float],
+        mutation_strategies: Dict[MutationStrategy, float],
+    ):
+        tree = self._get_tree(population, fitnesses)
+
+        chosen_strategies = self._choose_strategies(
+            mutation_strategies, k=self.offspring_count
+        )
+        for chosen_strategy in chosen_strategies:
+            if tree.positive_count:
+                parent_index = tree.sample(random.random() * tree.total)
+            else:
+                parent_index = random.randrange(len(population))
+
+            child = population[parent_index].copy()
+            chosen_strategy.mutate(child)
+
+            replaced_index = self._replace_oldest(population, fitnesses, child)
+            tree.update(replaced_index, 0.0)
+            self._tree_population[replaced_index] = child
+            self._children_indices.append(replaced_index)
+
+    def _get_tree(
+        self, population: List[Program], fitnesses: Dict[int, float]
+    ) -> "_FenwickTree":
+        """
+        Returns the weights tree for ``population``, updating only the slots
+        of the previous step's children when the rest of the population is
+        unchanged.
+        """
+        children_indices = self._children_indices
+        self._children_indices = []
+
+        if self._tree is None or self._tree_population != population:
+            return self._rebuild_tree(population, fitnesses)
+
+        for index in children_indices:
+            fitness = fitnesses[id(population[index])]
+            if math.isfinite(fitness) and fitness < self._weight_offset:
+                return self._rebuild_tree(population, fitnesses)
+            self._tree.update(index, self._weight(fitness))
+
+        return self._tree
+
+    def _rebuild_tree(
+        self, population: List[Program], fitnesses: Dict[int, float]
+    ) -> "_FenwickTree":
+        population_fitnesses = [fitnesses[id(program)] for program in population]
+        finite_fitnesses = [f for f in population_fitnesses if math.isfinite(f)]
+        self._weight_offset = min(finite_fitnesses) if finite_fitnesses else 0.0
+
+        self._tree = _FenwickTree([self._weight(f) for f in population_fitnesses])
+        self._tree_population = list(population)
+        return self._tree
+
+    def _weight(self, fitness: float) -> float:
+        return fitness - self._weight_offset if math.isfinite(fitness) else 0.0
 
 
 class FullPopulationMutationOperator(EvolutionOperator):
@@ -97,14 +247,79 @@ class FullPopulationMutationOperator(EvolutionOperator):
     @override
     def apply(
         self,
-        population: deque[Program],
-        fitnesses: Dict[Program, float],
+        population: List[Program],
+        fitnesses: Dict[int, float],
         mutation_strategies: Dict[MutationStrategy, float],
     ):
-        for program in population:
-            chosen_strategy = random.choices(
-                list(mutation_strategies.keys()),
-                weights=list(mutation_strategies.values()),
-                k=1,
-            )[0]
+        chosen_strategies = self._choose_strategies(
+            mutation_strategies, k=len(population)
+        )
+        for program, chosen_strategy in zip(population, chosen_strategies):
             chosen_strategy.mutate(program)
+
+
+class _FenwickTree:
+    """
+    Fenwick (binary indexed) tree over non-negative weights.
+
+    Supports O(log N) weight updates and O(log N) sampling of an index with
+    probability proportional to its weight.
+
+    Inner node sums drift under floating-point updates, so the number of
+    positive weights is tracked exactly in ``positive_count`` and sampling
+    never returns an index whose weight is 0 while any weight is positive.
+    """
+
+    def __init__(self, weights: List[float]):
+        self._size = len(weights)
+        self._weights = list(weights)
+        self._tree = [0.0] + self._weights
+        for i in range(1, self._size + 1):
+            parent = i + (i & -i)
+            if parent <= self._size:
+                self._tree[parent] += self._tree[i]
+
+        self._top_step = 1 << (self._size.bit_length() - 1) if self._size else 0
+        self.total = sum(self._weights)
+        self.positive_count = sum(1 for weight in self._weights if weight > 0)
+
+    def update(self, index: int, weight: float):
+        old_weight = self._weights[index]
+        delta = weight - old_weight
+        self._weights[index] = weight
+        self.positive_count += (weight > 0) - (old_weight > 0)
+        self.total = self.total + delta if self.positive_count else 0.0
+
+        i = index + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def sample(self, u: float) -> int:
+        """
+        Returns the first index whose cumulative weight exceeds ``u``,
+        where ``0 <= u < total``.
+        """
+        position = 0
+        step = self._top_step
+        while step:
+            next_position = position + step
+            if next_position <= self._size and self._tree[next_position] <= u:
+                position = next_position
+                u -= self._tree[next_position]
+            step >>= 1
+
+        index = min(position, self._size - 1)
+        if self._weights[index] > 0 or not self.positive_count:
+            return index
+
+        return self._nearest_positive(index)
+
+    def _nearest_positive(self, index: int) -> int:
+        for i in range(index + 1, self._size):
+            if self._weights[i] > 0:
+                return i
+        for i in range(index - 1, -1, -1):
+            if self._weights[i] > 0:
+                return i
+        return index
@@ -2,6 +2,10 @@ class InvalidStatementIndexError(Exception):
     pass
 
 
+class InsertStatementError(Exception):
+    pass
+
+
 class RemoveStatementError(Exception):
     pass
 
@@ -36,6 +36,18 @@ class Step:
         to_row(): Returns the step data as a list, suitable for logging or tabular storage.
     """
 
+    __slots__ = (
+        "step",
+        "start_time",
+        "end_time",
+        "pop_best_program_fitness",
+        "pop_best_program",
+        "working_programs_percent",
+        "overall_best_fitness",
+        "overall_best_program",
+        "duration",
+    )
+
     def __init__(self, step: int):
         self.step = step
         self.start_time = None
@@ -87,6 +99,13 @@ class StepsTracker(ABC):
         """
         pass
 
+    def flush(self):
+        """
+        Persist any steps the tracker still holds. Called by `ProgramSearch`
+        when a search finishes; the default implementation does nothing.
+        """
+        pass
+
 
 class CsvStepsTracker(StepsTracker):
     """
@@ -97,6 +116,10 @@ class CsvStepsTracker(StepsTracker):
     step index, duration, population best fitness, working programs percentage,
     overall best fitness, and program codes.
 
+    The file is only opened while a batch is written, and each batch is
+    written with a single `writerows` call. Steps left over when a search
+    finishes are written by `flush()`.
+
     Attributes:
         file_path (str): Path to the CSV file where steps are saved.
         save_batch_size (int): Number of steps to collect before saving to CSV.
@@ -151,14 +174,20 @@ class CsvStepsTracker(StepsTracker):
             self._append_to_csv()
             self.steps.clear()
 
+    @override
+    def flush(self):
+        """
+        Write the steps collected since the last full batch to the CSV file.
+        """
+        self._append_to_csv()
+        self.steps.clear()
+
     def _append_to_csv(self):
         if not self.steps:
             return
 
         with open(self.file_path, mode="a", newline="") as f:
-            writer = csv.writer(f)
-            for s in self.steps:
-                writer.writerow(self.to_row(s))
+            csv.writer(f).writerows(self.to_row(s) for s in self.steps)
 
     def to_row(self, step: Step):
         return [
@@ -1,10 +1,10 @@
 import random
 from abc import ABC, abstractmethod
 
-from typing_extensions import Dict, List, override
+from typing_extensions import Dict, override
 
 from program_searcher.exceptions import RemoveStatementError
-from program_searcher.program_model import Program, Statement
+from program_searcher.program_model import Program, RandomStatementGenerator
 
 
 class MutationStrategy(ABC):
@@ -14,8 +14,17 @@ class MutationStrategy(ABC):
     Each implementation should modify the given `Program` object **in-place**
     rather than returning a new object. This ensures that mutation is applied
     directly without requiring extra copying or reassignment logic.
+
+    Attributes
+    ----------
+    rng : random.Random
+        Random number generator used to draw mutations. Defaults to the
+        global `random` module, so `random.seed` controls it.
     """
 
+    def __init__(self, rng: random.Random = None):
+        self.rng = rng if rng is not None else random
+
     @abstractmethod
     def mutate(self, program: Program):
         """
@@ -32,7 +41,7 @@ class MutationStrategy(ABC):
             The mutation is applied directly to `program`; no new object
             should be returned.
         """
-        raise NotImplementedError
+        pass
 
 
 class RemoveStatementMutationStrategy(MutationStrategy, ABC):
@@ -48,6 +57,8 @@ class RemoveStatementMutationStrategy(MutationStrategy, ABC):
     Attributes:
         remove_retries (int): Maximum number of attempts to remove a statement.
                               Defaults to 3.
+        rng (random.Random): Random number generator. Defaults to the global
+                             `random` module.
 
     Methods:
         mutate(program: Program) -> None:
@@ -56,7 +67,8 @@ class RemoveStatementMutationStrategy(MutationStrategy, ABC):
             the program remains unchanged.
     """
 
-    def __init__(self, remove_retries: int = 3):
+    def __init__(self, remove_retries: int = 3, rng: random.Random = None):
+        super().__init__(rng)
         self.remove_retries = remove_retries
 
     @override
@@ -68,7 +80,7 @@ class RemoveStatementMutationStrategy(MutationStrategy, ABC):
 
         for _ in range(self.remove_retries):
             try:
-                statement_to_remove_idx = random.randrange(max_index)
+                statement_to_remove_idx = self.rng.randrange(max_index)
                 program.remove_statement(statement_to_remove_idx)
                 return
             except RemoveStatementError:
@@ -90,6 +102,8 @@ class ReplaceStatementMutationStrategy(MutationStrategy, ABC):
         available_functions (Dict[str, int]):
             A mapping from function name to the required number of arguments
             that function expects.
+        rng (random.Random):
+            Random number generator. Defaults to the global `random` module.
 
     Methods:
         mutate(program: Program) -> None:
@@ -98,27 +112,28 @@ class ReplaceStatementMutationStrategy(MutationStrategy, ABC):
             the program remains unchanged.
     """
 
-    def __init__(self, available_functions: Dict[str, int]):
+    def __init__(self, available_functions: Dict[str, int], rng: random.Random = None):
+        super().__init__(rng)
         self.available_functions = available_functions
+        self._statement_generator = RandomStatementGenerator(available_functions)
 
     @override
     def mutate(self, program: Program):
-        func_name = random.choice(list(self.available_functions.keys()))
-        args_size = self.available_functions[func_name]
-
-        if not program.variables and args_size > 0:
+        max_index = len(program) - (1 if program.has_return_statement() else 0)
+        if max_index <= 0:
             return
 
-        args = random.choices(program.variables, k=args_size)
+        func_name, args_size = self._statement_generator.random_function(self.rng)
 
-        max_index = len(program) - (1 if program.has_return_statement() else 0)
-        if max_index <= 0:
+        if not program.variables and args_size > 0:
             return
 
-        replace_index = random.randrange(max_index)
-        replace_statement = program.get_statement(replace_index)
-        replace_statement.func = func_name
-        replace_statement.args = args
+        args = self._statement_generator.random_args(
+            program.variables, args_size, self.rng
+        )
+
+        replace_index = self.rng.randrange(max_index)
+        program.update_statement_full(replace_index, func_name, args)
 
 
 class UpdateStatementArgsMutationStrategy(MutationStrategy, ABC):
@@ -128,7 +143,9 @@ class UpdateStatementArgsMutationStrategy(MutationStrategy, ABC):
     This strategy selects a random statement (including the return statement, if present)
     and replaces its arguments with new variables randomly chosen from the program's
     current variables. The number of arguments remains the same as in the original
-    statement. The statement's function and target variable are not modified.
+    statement. The statement's function and target variable are not modified, and
+    the statement's own result variable is not used as one of its arguments
+    whenever another variable is available.
 
     Methods:
         mutate(program: Program) -> None:
@@ -138,15 +155,24 @@ class UpdateStatementArgsMutationStrategy(MutationStrategy, ABC):
 
     @override
     def mutate(self, program: Program):
-        if len(program) == 0:
+        statements_count = len(program)
+        if statements_count == 0:
             return
 
-        statement_idx = random.randrange(len(program))
+        statement_idx = self.rng.randrange(statements_count)
         statement = program.get_statement(statement_idx)
         statement_args_count = len(statement.args)
 
-        new_args = random.choices(program.variables, k=statement_args_count)
-        statement.args = new_args
+        vars_list = program.variables
+        vars_count = len(vars_list)
+        excluded = statement.result_var_name
+
+        new_args = []
+        for i in self.rng.choices(range(vars_count), k=statement_args_count):
+            if vars_list[i] == excluded:
+                i = (i + 1) % vars_count
+            new_args.append(vars_list[i])
+        program.update_statment_args(statement_idx, new_args)
 
 
 class InsertStatementMutationStrategy(MutationStrategy, ABC):
@@ -161,27 +187,28 @@ class InsertStatementMutationStrategy(MutationStrategy, ABC):
     ----------
     available_functions : Dict[str, int]
         A mapping of function names to the number of arguments they require.
+    rng : random.Random
+        Random number generator. Defaults to the global `random` module.
     """
 
-    def __init__(self, available_functions: Dict[str, int]):
+    def __init__(self, available_functions: Dict[str, int], rng: random.Random = None):
+        super().__init__(rng)
         self.available_functions = available_functions
+        self._statement_generator = RandomStatementGenerator(available_functions)
 
     @override
     def mutate(self, program: Program):
-        if len(program) == 0:
+        statements_count = len(program)
+        if statements_count == 0:
             return
 
-        max_index = len(program) - (1 if program.has_return_statement() else 0)
+        max_index = statements_count - (1 if program.has_return_statement() else 0)
         if max_index <= 0:
             return
 
-        insert_index = random.randrange(max_index)
+        insert_index = self.rng.randrange(max_index)
 
-        statement = self._generate_random_statement(program.variables)
+        statement = self._statement_generator.random_statement(
+            program.variables, self.rng
+        )
         program.insert_statement(statement, insert_index)
-
-    def _generate_random_statement(self, program_vars: List[str]) -> Statement:
-        func_name = random.choice(list(self.available_functions.keys()))
-        allowed_args_size = self.available_functions[func_name]
-        args = random.choices(program_vars, k=allowed_args_size)
-        return Statement(func=func_name, args=args)
@@ -1,30 +1,81 @@
-import copy
 import hashlib
+import random
+import sys
+from types import CodeType
 
 import networkx as nx
-from typing_extensions import Callable, Dict, List
+from typing_extensions import Callable, Dict, List, Sequence, Tuple
 
 from program_searcher.exceptions import (
     ExecuteProgramError,
+    InsertStatementError,
     InvalidStatementIndexError,
     RemoveStatementError,
     UpdateStatementArgumentsError,
 )
 
+_HASH_TOKEN_SEPARATOR = "\x1f"
+_HASH_STATEMENT_SEPARATOR = "\x1e"
+
+CanonicalKey = Tuple[Tuple[str, ...], ...]
+
 
 class Statement:
+    """
+    A single assignment (or return) line of a `Program`.
+
+    `args`, `func` and `result_var_name` are read-only; a statement that is
+    part of a program is edited through the `Program` methods, which keep the
+    program's variable references and caches consistent with the edit. A
+    statement belongs to at most one program at a time.
+    """
+
     RETURN_KEYWORD = "return"
     CONST_KEYWORD = "const"
 
-    def __init__(self, args: List, func: str):
-        self.result_var_name = None
-        self.args = args
-        self.func = func
+    __slots__ = ("_result_var_name", "_args", "_func", "_code", "_in_program")
+
+    def __init__(self, args: Sequence[str], func: str):
+        self._code = None
+        self._in_program = False
+        self._result_var_name = None
+        self._args = tuple(args)
+        self._func = sys.intern(func)
+
+    @property
+    def result_var_name(self) -> str:
+        return self._result_var_name
+
+    @property
+    def args(self) -> Tuple[str, ...]:
+        return self._args
+
+    @property
+    def func(self) -> str:
+        return self._func
+
+    def _set_call(self, func: str, args: Sequence[str]):
+        self._func = sys.intern(func)
+        self._args = tuple(args)
+        self._code = None
 
     def set_result_var_name(self, result_var_name: str):
-        self.result_var_name = result_var_name
+        self._result_var_name = result_var_name
+        self._code = None
 
     def to_code(self) -> str:
+        """
+        Returns the statement rendered as a line of Python code.
+
+        The line is cached until `func`, `args` or `result_var_name` is
+        changed, so unchanged statements are not re-rendered when the
+        program code is regenerated after a mutation.
+        """
+        if self._code is None:
+            self._code = self._render_code()
+        return self._code
+
+    def _render_code(self) -> str:
         if not len(self.args):
             return f"{self.result_var_name}={self.func}()"
         elif len(self.args) == 1:
@@ -40,16 +91,60 @@ class Statement:
         return f"{self.result_var_name}={self.func}({args_str})"
 
     def copy(self):
-        args_copy = self.args.copy()
-
-        new_stmt = Statement(args_copy, self.func)
-        new_stmt.result_var_name = self.result_var_name
+        new_stmt = Statement(self._args, self._func)
+        new_stmt._result_var_name = self._result_var_name
+        new_stmt._code = self._code
         return new_stmt
 
     def is_equivalent(self, other: "Statement"):
         return self.func == other.func and self.args == other.args
 
 
+class RandomStatementGenerator:
+    """
+    Draws random functions and statements from a mapping of function names
+    to the number of arguments they take.
+
+    Function names and arities are stored as tuples once, so each draw is a
+    single index lookup instead of building lists from the mapping.
+    """
+
+    __slots__ = ("_func_names", "_arities")
+
+    def __init__(self, available_functions: Dict[str, int]):
+        self._func_names = tuple(available_functions.keys())
+        self._arities = tuple(available_functions.values())
+
+    def random_function(self, rng: random.Random = random) -> Tuple[str, int]:
+        """
+        Returns a random function name together with its arity.
+        """
+        idx = rng.randrange(len(self._func_names))
+        return self._func_names[idx], self._arities[idx]
+
+    def random_args(
+        self, program_vars: List[str], args_count: int, rng: random.Random = random
+    ) -> Tuple[str, ...]:
+        """
+        Returns ``args_count`` variables drawn with replacement from
+        ``program_vars``.
+        """
+        if not args_count:
+            return ()
+        return tuple(rng.choices(program_vars, k=args_count))
+
+    def random_statement(
+        self, program_vars: List[str], rng: random.Random = random
+    ) -> Statement:
+        """
+        Returns a statement calling a random function on random variables.
+        """
+        func_name, args_count = self.random_function(rng)
+        return Statement(
+            func=func_name, args=self.random_args(program_vars, args_count, rng)
+        )
+
+
 class Program:
     def __init__(
         self,
@@ -59,30 +154,52 @@ class Program:
     ):
         self.program_name = program_name
         self.program_arg_names = program_arg_names
+        self._arg_names_set = frozenset(program_arg_names)
         self.return_vars_count = return_vars_count
 
-        self.variables = program_arg_names.copy()
+        self.variables = [sys.intern(arg_name) for arg_name in program_arg_names]
         self._statements: List[Statement] = []
         self.last_variable_index = 1
         self.execution_error = None
-        self.program_str = None
+        self._program_str: str = None
         self.graph: nx.Graph = None
+        self._has_return_statement = False
+        self._var_references: Dict[str, int] = {}
+        self._hash: str = None
+        self._canonical_key: CanonicalKey = None
+        self._compiled_code: CodeType = None
+        self._compiled_source: str = None
+        self._validated_allowed_func: Dict[str, int] = None
+        self._validated_count = 0
 
     def get_statement(self, index: int):
         self._ensure_proper_stmt_index(index)
         return self._statements[index]
 
     def insert_statement(self, statement: Statement, index: int = -1):
-        variable_name = f"x{self.last_variable_index}"
+        if statement._in_program:
+            raise InsertStatementError(
+                "Statement is already part of a program. Insert a copy instead."
+            )
+
+        variable_name = sys.intern(f"x{self.last_variable_index}")
         self.last_variable_index += 1
 
         statement.set_result_var_name(variable_name)
+        statement._in_program = True
         self.variables.append(variable_name)
 
         if index == -1:
             self._statements.append(statement)
+            self._invalidate_validation(len(self._statements) - 1)
         else:
             self._statements.insert(index, statement)
+            self._invalidate_validation(index)
+
+        self._add_var_references(statement.args)
+        if statement.func == Statement.RETURN_KEYWORD:
+            self._has_return_statement = True
+        self._invalidate_caches()
 
     def remove_statement(self, index: int):
         if not self._statements:
@@ -93,21 +210,27 @@ class Program:
         self._ensure_proper_stmt_index(index)
         stmt_to_remove = self._statements[index]
 
-        if stmt_to_remove.result_var_name not in self.variables:
+        try:
+            variable_index = self.variables.index(stmt_to_remove.result_var_name)
+        except ValueError:
             raise RemoveStatementError(
                 f"Variable '{stmt_to_remove.result_var_name}' is not contained in program variables."
-            )
+            ) from None
 
-        for stmt in self._statements:
-            if stmt_to_remove.result_var_name in stmt.args:
-                raise RemoveStatementError(
-                    f"Variable '{stmt_to_remove.result_var_name}' is still referenced by another statement – cannot remove."
-                )
+        if self._var_references.get(stmt_to_remove.result_var_name):
+            raise RemoveStatementError(
+                f"Variable '{stmt_to_remove.result_var_name}' is still referenced by another statement – cannot remove."
+            )
 
-        self._statements.remove(stmt_to_remove)
+        del self._statements[index]
+        del self.variables[variable_index]
+        stmt_to_remove._in_program = False
+        self._remove_var_references(stmt_to_remove.args)
 
-        if stmt_to_remove.result_var_name is not None:
-            self.variables.remove(stmt_to_remove.result_var_name)
+        if stmt_to_remove.func == Statement.RETURN_KEYWORD:
+            self._update_has_return_statement()
+        self._invalidate_validation(index)
+        self._invalidate_caches()
 
     def update_statement_full(self, index: int, new_func, new_args):
         if not self._statements:
@@ -117,8 +240,15 @@ class Program:
 
         self._ensure_proper_stmt_index(index)
         stmt = self._statements[index]
-        stmt.args = new_args
-        stmt.func = new_func
+        old_func = stmt.func
+        self._remove_var_references(stmt.args)
+        stmt._set_call(new_func, new_args)
+        self._add_var_references(new_args)
+
+        if Statement.RETURN_KEYWORD in (old_func, new_func):
+            self._update_has_return_statement()
+        self._invalidate_validation(index)
+        self._invalidate_caches()
 
     def update_statment_args(self, index: int, new_args: List):
         self._ensure_proper_stmt_index(index)
@@ -130,21 +260,34 @@ class Program:
                 f"arguments, but got {len(new_args)}."
             )
 
-        stmt_to_modify.args = new_args
+        self._remove_var_references(stmt_to_modify.args)
+        stmt_to_modify._set_call(stmt_to_modify.func, new_args)
+        self._add_var_references(new_args)
+        self._invalidate_validation(index)
+        self._invalidate_caches()
+
+    @property
+    def program_str(self) -> str:
+        """
+        Python source of the program.
+
+        The source is generated on first access and cached until the
+        statements change, so executing an unchanged program does not
+        rebuild it.
+        """
+        if self._program_str is None:
+            self.generate_code()
+        return self._program_str
 
     def generate_code(self) -> str:
         self._add_return_statement_if_not_contained()
 
-        program_str = f"def {self.program_name}"
-        if self.program_arg_names:
-            program_str += f"({', '.join(self.program_arg_names)}):\n"
-        else:
-            program_str += "():\n"
+        lines = [f"def {self.program_name}({', '.join(self.program_arg_names)}):"]
+        lines.extend(f"   {stmt.to_code()}" for stmt in self._statements)
+        lines.append("")
 
-        for stmt in self._statements:
-            program_str += f"   {stmt.to_code()}\n"
-
-        self.program_str = program_str
+        self._program_str = "\n".join(lines)
+        return self._program_str
 
     def execute(
         self, program_args: Dict[str, object] = {}, global_args: Dict[str, object] = {}
@@ -184,21 +327,18 @@ class Program:
         - `program_args` are executed as the local namespace, and `global_args`
         as the global namespace when evaluating `self.program_str`.
         """
-        if set(program_args.keys()) != set(self.program_arg_names):
+        if program_args.keys() != self._arg_names_set:
             raise ExecuteProgramError(
                 f"Invalid arguments for program execution. "
                 f"Expected keys: {set(self.program_arg_names)}, "
                 f"but got: {set(program_args.keys())}."
             )
 
-        if self.program_str is None:
-            self.generate_code()
-
         try:
-            exec(self.program_str, global_args, program_args)
+            exec(self._get_compiled_code(), global_args, program_args)
 
-            func_args = {k: program_args[k] for k in self.program_arg_names}
-            return_value = program_args[self.program_name](**func_args)
+            func_args = [program_args[k] for k in self.program_arg_names]
+            return_value = program_args[self.program_name](*func_args)
             self.execution_error = None
 
             return return_value
@@ -207,18 +347,40 @@ class Program:
             raise e
 
     def abstract_execution(self, allowed_func: Dict[str, int]):
+        """
+        Checks that the program only uses allowed functions with matching
+        argument counts, and that every variable is defined before usage.
+
+        Statements that passed a previous check with the same `allowed_func`
+        and were not modified since are not validated again; only the
+        statements from the first modified one onwards are checked.
+
+        Raises
+        ------
+        ExecuteProgramError
+            If the program has no return statement or a statement is invalid.
+        """
         self._add_return_statement_if_not_contained()
         allowed_func = allowed_func.copy()
         allowed_func[Statement.RETURN_KEYWORD] = self.return_vars_count
 
-        defined_vars = set(self.program_arg_names)
+        if allowed_func != self._validated_allowed_func:
+            self._validated_allowed_func = allowed_func
+            self._validated_count = 0
 
         if not self.has_return_statement():
             raise ExecuteProgramError(
                 "Program must contain a return statement, but none was found."
             )
 
-        for i, stmt in enumerate(self._statements):
+        validated_count = self._validated_count
+        defined_vars = set(self.program_arg_names)
+        defined_vars.update(
+            stmt.result_var_name for stmt in self._statements[:validated_count]
+        )
+
+        for i in range(validated_count, len(self._statements)):
+            stmt = self._statements[i]
             func_name = stmt.func
             args = stmt.args
 
@@ -243,6 +405,7 @@ class Program:
                     )
 
             defined_vars.add(stmt.result_var_name)
+            self._validated_count = i + 1
 
     def generate_graph(self) -> nx.DiGraph:
         if not self.has_return_statement():
@@ -288,48 +451,114 @@ class Program:
         self.graph = G
 
     def to_hash(self):
+        """
+        Returns a digest of the program structure that is equal for programs
+        differing only in variable names.
+
+        The digest is cached until the program's statements are modified.
+        Statements can only be modified through `Program` methods, which
+        invalidate the cache directly, so no per-edit lookup is needed.
+        """
+        if self._hash is None:
+            self._hash = self._compute_hash()
+        return self._hash
+
+    def to_canonical_key(self) -> CanonicalKey:
+        """
+        Returns the program structure as a hashable tuple that is equal for
+        programs differing only in variable names.
+
+        Each statement is a tuple of its function followed by its canonical
+        argument and result variable names. The key is cached until the
+        program's statements are modified, and is cheaper to use as a dict
+        or set key than computing `to_hash`.
+        """
+        if self._canonical_key is None:
+            self._canonical_key = self._compute_canonical_key()
+        return self._canonical_key
+
+    def _compute_canonical_key(self) -> CanonicalKey:
         var_mapping = {}
         canonical_counter = 0
 
         for i, arg in enumerate(self.program_arg_names):
             var_mapping[arg] = f"in{i}"
 
-        canonical_repr = []
+        canonical_stmts = []
 
         for stmt in self._statements:
-            canon_args = []
+            tokens = [stmt.func]
             for arg in stmt.args:
                 if arg not in var_mapping:
                     var_mapping[arg] = f"v{canonical_counter}"
                     canonical_counter += 1
-                canon_args.append(var_mapping[arg])
+                tokens.append(var_mapping[arg])
 
             if stmt.result_var_name not in var_mapping:
                 var_mapping[stmt.result_var_name] = f"v{canonical_counter}"
                 canonical_counter += 1
-            result_var = var_mapping[stmt.result_var_name]
+            tokens.append(var_mapping[stmt.result_var_name])
+
+            canonical_stmts.append(tuple(tokens))
 
-            canonical_repr.append((stmt.func, tuple(canon_args), result_var))
+        return tuple(canonical_stmts)
 
-        repr_str = str(canonical_repr).encode("utf-8")
-        return hashlib.sha256(repr_str).hexdigest()
+    def _compute_hash(self):
+        repr_bytes = _HASH_STATEMENT_SEPARATOR.join(
+            _HASH_TOKEN_SEPARATOR.join(tokens) for tokens in self.to_canonical_key()
+        ).encode("utf-8")
+        return hashlib.blake2b(repr_bytes, digest_size=16).hexdigest()
 
     def copy(self):
-        new_program = Program(self.program_name, self.program_arg_names.copy())
-        new_program._statements = [copy.deepcopy(stmt) for stmt in self._statements]
+        """
+        Returns an independent copy of the program.
+
+        Fields are copied directly instead of going through `__init__`;
+        immutable values and the caches derived from the statements are
+        shared, while mutable containers and statements are copied.
+        """
+        new_program = Program.__new__(Program)
+        new_program.program_name = self.program_name
+        new_program.program_arg_names = self.program_arg_names.copy()
+        new_program._arg_names_set = self._arg_names_set
+        new_program.return_vars_count = self.return_vars_count
+
         new_program.variables = self.variables.copy()
+        new_program._statements = [stmt.copy() for stmt in self._statements]
+        for stmt in new_program._statements:
+            stmt._in_program = True
         new_program.last_variable_index = self.last_variable_index
+        new_program.execution_error = None
+        new_program._program_str = self._program_str
+        new_program.graph = None
+        new_program._has_return_statement = self._has_return_statement
+        new_program._var_references = self._var_references.copy()
+        new_program._hash = self._hash
+        new_program._canonical_key = self._canonical_key
+        new_program._compiled_code = self._compiled_code
+        new_program._compiled_source = self._compiled_source
+        new_program._validated_allowed_func = self._validated_allowed_func
+        new_program._validated_count = self._validated_count
         return new_program
 
     def to_python_func(self, global_args: Dict[str, object] = {}) -> Callable:
         local_ns = {}
-        exec(self.program_str, global_args, local_ns)
-        func = local_ns[self.program_name]
+        exec(self._get_compiled_code(), global_args, local_ns)
+        return local_ns[self.program_name]
 
-        def wrapper(*args, **kwargs):
-            return func(*args, **kwargs)
+    def _get_compiled_code(self) -> CodeType:
+        """
+        Returns the code object compiled from `self.program_str`.
 
-        return wrapper
+        The program source is compiled once and reused until `program_str`
+        is regenerated, so repeated executions skip parsing and compiling.
+        """
+        if self._compiled_source is not self.program_str:
+            self._compiled_code = compile(
+                self.program_str, f"<{self.program_name}>", "exec"
+            )
+            self._compiled_source = self.program_str
+        return self._compiled_code
 
     def _add_return_statement_if_not_contained(self):
         if self.has_return_statement():
@@ -337,7 +566,11 @@ class Program:
 
         return_vars = self.variables[-self.return_vars_count :]
         return_stmt = Statement(func="return", args=return_vars)
+        return_stmt._in_program = True
         self._statements.append(return_stmt)
+        self._add_var_references(return_vars)
+        self._has_return_statement = True
+        self._invalidate_caches()
 
     def _ensure_proper_stmt_index(self, index: int):
         if index < 0 or index > len(self._statements) - 1:
@@ -347,7 +580,32 @@ class Program:
             )
 
     def has_return_statement(self):
-        return any(stmt.func == Statement.RETURN_KEYWORD for stmt in self._statements)
+        return self._has_return_statement
+
+    def _invalidate_validation(self, index: int):
+        self._validated_count = min(self._validated_count, max(index, 0))
+
+    def _invalidate_caches(self):
+        self._hash = None
+        self._canonical_key = None
+        self._program_str = None
+
+    def _add_var_references(self, args: List):
+        for arg in args:
+            self._var_references[arg] = self._var_references.get(arg, 0) + 1
+
+    def _remove_var_references(self, args: List):
+        for arg in args:
+            count = self._var_references[arg] - 1
+            if count:
+                self._var_references[arg] = count
+            else:
+                del self._var_references[arg]
+
+    def _update_has_return_statement(self):
+        self._has_return_statement = any(
+            stmt.func == Statement.RETURN_KEYWORD for stmt in self._statements
+        )
 
     def __len__(self):
         return len(self._statements)
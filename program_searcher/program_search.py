@@ -1,6 +1,6 @@
 import logging
 import random
-from collections import deque
+from collections import OrderedDict
 
 from typing_extensions import Callable, Dict, List, Tuple
 
@@ -15,7 +15,12 @@ from program_searcher.mutation_strategy import (
     RemoveStatementMutationStrategy,
     UpdateStatementArgsMutationStrategy,
 )
-from program_searcher.program_model import Program, Statement, WarmStartProgram
+from program_searcher.program_model import (
+    CanonicalKey,
+    Program,
+    RandomStatementGenerator,
+    WarmStartProgram,
+)
 from program_searcher.stop_condition import StopCondition
 
 _DEFAULT_MUTATION_STRATEGIES = {
@@ -23,7 +28,52 @@ _DEFAULT_MUTATION_STRATEGIES = {
     RemoveStatementMutationStrategy(): 1 / 2,
 }
 
-_DEFAULT_EVOLUTION_OPERATOR = TournamentSelectionOperator(tournament_size=2)
+_DEFAULT_TOURNAMENT_SIZE = 2
+
+
+def _validate_program_search_args(
+    min_program_statements: int,
+    max_program_statements: int,
+    pop_size: int,
+    fitness_cache_size: int,
+    mutation_strategies: Dict[MutationStrategy, float],
+):
+    """
+    Validates ProgramSearch arguments, raising InvalidProgramSearchArgumentValue
+    for the first invalid one. Kept free of ProgramSearch state so arguments
+    can be checked without constructing a search.
+    """
+    if min_program_statements > max_program_statements:
+        raise InvalidProgramSearchArgumentValue(
+            f"min_program_statements ({min_program_statements}) cannot be greater than "
+            f"max_program_statements ({max_program_statements})."
+        )
+
+    if pop_size < 0:
+        raise InvalidProgramSearchArgumentValue(
+            f"pop_size must be non-negative, got {pop_size}."
+        )
+
+    if fitness_cache_size < 0:
+        raise InvalidProgramSearchArgumentValue(
+            f"fitness_cache_size must be non-negative, got {fitness_cache_size}."
+        )
+
+    probabilities_sum = 0.0
+    values_in_range = True
+    for value in mutation_strategies.values():
+        probabilities_sum += value
+        values_in_range &= 0.0 <= value <= 1.0
+
+    if abs(probabilities_sum - 1.0) > 1e-6:
+        raise InvalidProgramSearchArgumentValue(
+            f"sum of mutation_strategies values must be 1.0, but is {probabilities_sum}."
+        )
+
+    if not values_in_range:
+        raise InvalidProgramSearchArgumentValue(
+            f"all mutation_strategies values must be in range [0, 1]. current values: {mutation_strategies}."
+        )
 
 
 class ProgramSearch:
@@ -60,11 +110,17 @@ class ProgramSearch:
                 - logger (logging.Logger, default=logging.getLogger(__name__)): Logger for informational and error messages.
                 - step_trackers (List[StepsTracker], default=[]): List of step trackers for recording step statistics.
                 - seed (int, default=None). Seed for random.
+                - fitness_cache_size (int, default=pop_size * 8): Maximum number of fitnesses memoized by
+                  canonical program key, so structurally equivalent programs are evaluated once. 0 disables the cache.
+                - evaluate_population_func (Callable[[List[Program]], List[float]], default=None): Function
+                  evaluating all programs that need a fitness in one call, returning fitnesses in the same order.
+                  Allows batched or vectorized evaluation; when None, evaluate_program_func is called per program.
         """
         self.program_name = program_name
         self.program_arg_names = program_arg_names
         self.return_program_var_count = return_program_var_count
         self.available_functions = available_functions
+        self._statement_generator = RandomStatementGenerator(available_functions)
         self.stop_condition = stop_condition
         self.evaluate_program_func = evaluate_program_func
         self.min_program_statements = min_program_statements
@@ -73,8 +129,8 @@ class ProgramSearch:
         config = config or {}
         self.pop_size: int = config.get("pop_size", 1000)
         self.evolution_operator: EvolutionOperator = config.get(
-            "evolution_operator", _DEFAULT_EVOLUTION_OPERATOR
-        )
+            "evolution_operator"
+        ) or TournamentSelectionOperator(tournament_size=_DEFAULT_TOURNAMENT_SIZE)
         self.mutation_strategies: Dict[MutationStrategy, float] = config.get(
             "mutation_strategies", _DEFAULT_MUTATION_STRATEGIES
         )
@@ -85,14 +141,25 @@ class ProgramSearch:
         )
         self.step_trackers: List[StepsTracker] = config.get("step_trackers", [])
         self.seed: int = config.get("seed", None)
+        self.fitness_cache_size: int = config.get(
+            "fitness_cache_size", self.pop_size * 8
+        )
+        self.evaluate_population_func: Callable[[List[Program]], List[float]] = (
+            config.get("evaluate_population_func")
+        )
 
-        self.population: deque[Program] = deque()
-        self.fitnesses: Dict[Program, float] = {}
+        self.population: List[Program] = []
+        self.fitnesses: Dict[int, float] = {}
         self.error_programs: Dict[Program, bool] = {}
         self.tournament_winner = None
         self.tournament_winner_fitness = None
+        self.pop_best_program = None
+        self.pop_best_program_fitness = None
         self.best_program = None
         self.best_program_fitness = None
+        self._fitness_cache: OrderedDict[CanonicalKey, Tuple[float, Exception]] = (
+            OrderedDict()
+        )
 
         self._validate_arguments()
         self._init_seeds()
@@ -110,7 +177,8 @@ class ProgramSearch:
             5. Replaces equivalent programs to maintain diversity.
             6. Optionally restarts the search at configured intervals (`self.restart_steps`).
 
-        Each step is tracked via a `Step` object, and any registered step trackers are notified through `_on_step_is_done`.
+        Each step is tracked via a `Step` object, and any registered step trackers are notified through `_on_step_is_done`
+        and flushed once the search finishes.
 
         Returns
         -------
@@ -150,6 +218,9 @@ class ProgramSearch:
             self._on_step_is_done(step)
             steps_counter += 1
 
+        for step_tracker in self.step_trackers:
+            step_tracker.flush()
+
         return self.best_program, self.best_program_fitness
 
     def _initialize_population(self):
@@ -170,50 +241,112 @@ class ProgramSearch:
             )
             self.warm_start_program.fitness = warm_start_program_fitness
 
-        warm_hash = (
-            self.warm_start_program.program.to_hash()
+        warm_key = (
+            self.warm_start_program.program.to_canonical_key()
             if self.warm_start_program is not None
             else None
         )
 
+        self.fitnesses.clear()
+        programs_to_evaluate: List[Program] = []
+        program_keys: List[CanonicalKey] = []
+        duplicates: Dict[CanonicalKey, List[Program]] = {}
+
         for program in self.population:
-            if warm_hash is not None and program.to_hash() == warm_hash:
-                self.fitnesses[program] = self.warm_start_program.fitness
+            if warm_key is not None and program.to_canonical_key() == warm_key:
+                self.fitnesses[id(program)] = self.warm_start_program.fitness
+                continue
+
+            if not self.fitness_cache_size:
+                programs_to_evaluate.append(program)
+                continue
+
+            program_key = program.to_canonical_key()
+            cached = self._fitness_cache.get(program_key)
+            if cached is not None:
+                self._fitness_cache.move_to_end(program_key)
+                fitness, program.execution_error = cached
+                self.fitnesses[id(program)] = fitness
+            elif program_key in duplicates:
+                duplicates[program_key].append(program)
             else:
-                self.fitnesses[program] = self.evaluate_program_func(program)
+                duplicates[program_key] = []
+                programs_to_evaluate.append(program)
+                program_keys.append(program_key)
+
+        if programs_to_evaluate:
+            evaluated_fitnesses = self._evaluate_programs(programs_to_evaluate)
+            for program, fitness in zip(programs_to_evaluate, evaluated_fitnesses):
+                self.fitnesses[id(program)] = fitness
+
+            for program, program_key in zip(programs_to_evaluate, program_keys):
+                self._cache_fitness(program_key, program, duplicates[program_key])
+
+        self.pop_best_program = None
+        self.pop_best_program_fitness = None
+        if self.population:
+            self.pop_best_program = max(
+                self.population, key=lambda prog: self.fitnesses[id(prog)]
+            )
+            self.pop_best_program_fitness = self.fitnesses[id(self.pop_best_program)]
+
+    def _evaluate_programs(self, programs: List[Program]) -> List[float]:
+        if self.evaluate_population_func is not None:
+            return self.evaluate_population_func(programs)
+
+        return [self.evaluate_program_func(program) for program in programs]
+
+    def _cache_fitness(
+        self, program_key: CanonicalKey, program: Program, duplicates: List[Program]
+    ):
+        fitness = self.fitnesses[id(program)]
+        for duplicate in duplicates:
+            duplicate.execution_error = program.execution_error
+            self.fitnesses[id(duplicate)] = fitness
+
+        self._fitness_cache[program_key] = (fitness, program.execution_error)
+        if len(self._fitness_cache) > self.fitness_cache_size:
+            self._fitness_cache.popitem(last=False)
 
     def _replace_error_programs(self):
         for index, program in enumerate(self.population):
             if program.execution_error is not None:
                 self.logger.debug(
-                    f"Replacing program at index {index} failed execution: {program.execution_error}"
+                    "Replacing program at index %d failed execution: %s",
+                    index,
+                    program.execution_error,
                 )
                 self.population[index] = self._get_program_replacement()
                 continue
 
     def _replace_equivalent_programs(self):
-        seen_program_hashes = set()
+        seen_program_keys = set()
         replaced_count = 0
 
-        if self.warm_start_program is not None:
-            warm_start_progrma_hash = self.warm_start_program.program.to_hash()
+        warm_start_program_key = (
+            self.warm_start_program.program.to_canonical_key()
+            if self.warm_start_program is not None
+            else None
+        )
 
         for index, program in enumerate(self.population):
-            program_hash = program.to_hash()
+            program_key = program.to_canonical_key()
             is_warm_start = (
-                self.warm_start_program and program_hash == warm_start_progrma_hash
+                warm_start_program_key is not None
+                and program_key == warm_start_program_key
             )
 
-            if program_hash in seen_program_hashes and not is_warm_start:
+            if program_key in seen_program_keys and not is_warm_start:
                 self.logger.debug(
-                    f"Replacing program at index {index}. It is equivalent to other one."
+                    "Replacing program at index %d. It is equivalent to other one.",
+                    index,
                 )
                 self.population[index] = self._get_program_replacement()
                 replaced_count += 1
             else:
-                seen_program_hashes.add(program_hash)
+                seen_program_keys.add(program_key)
 
-        self.logger.debug(f"Replaced {replaced_count} equivalent programs")
+        self.logger.debug("Replaced %d equivalent programs", replaced_count)
 
     def _get_program_replacement(self):
         if self.warm_start_program is not None:
@@ -232,21 +365,14 @@ class ProgramSearch:
         )
 
         for _ in range(num_statements):
-            statement = self._generate_random_statement(program.variables)
+            statement = self._statement_generator.random_statement(program.variables)
             program.insert_statement(statement)
 
         return program
 
-    def _generate_random_statement(self, program_vars: List[str]) -> Statement:
-        func_name = random.choice(list(self.available_functions.keys()))
-        allowed_args_size = self.available_functions[func_name]
-        args = random.choices(program_vars, k=allowed_args_size)
-        return Statement(func=func_name, args=args)
-
     def _on_step_is_done(self, step: Step):
-        pop_best_program, pop_best_fitness = max(
-            self.fitnesses.items(), key=lambda x: x[1]
-        )
+        pop_best_program = self.pop_best_program
+        pop_best_fitness = self.pop_best_program_fitness
 
         if self.best_program is None or pop_best_fitness > self.best_program_fitness:
             self.best_program = pop_best_program
@@ -269,9 +395,13 @@ class ProgramSearch:
             step_tracker.track(step)
 
         self.logger.info(
-            f"  Step: {step.step} | Time: {step.duration:.2f}s |  "
-            f"Population best program fitness: {pop_best_fitness:.4f} | "
-            f"Overall best fitness: {self.best_program_fitness:.4f}"
+            "  Step: %s | Time: %.2fs |  "
+            "Population best program fitness: %.4f | "
+            "Overall best fitness: %.4f",
+            step.step,
+            step.duration,
+            pop_best_fitness,
+            self.best_program_fitness,
         )
 
     def _restart(self):
@@ -284,28 +414,10 @@ class ProgramSearch:
             random.seed(self.seed)
 
     def _validate_arguments(self):
-        if self.min_program_statements > self.max_program_statements:
-            raise InvalidProgramSearchArgumentValue(
-                f"min_program_statements ({self.min_program_statements}) cannot be greater than "
-                f"max_program_statements ({self.max_program_statements})."
-            )
-
-        if self.pop_size < 0:
-            raise InvalidProgramSearchArgumentValue(
-                f"pop_size must be non-negative, got {self.pop_size}."
-            )
-
-        if abs(sum(self.mutation_strategies.values()) - 1.0) > 1e-6:
-            raise InvalidProgramSearchArgumentValue(
-                f"sum of mutation_strategies values must be 1.0, but is {sum(self.mutation_strategies.values())}."
-            )
-
-        if any(value < 0 for value in self.mutation_strategies.values()):
-            raise InvalidProgramSearchArgumentValue(
-                f"all mutation_strategies values must be >= 0. current values: {self.mutation_strategies}."
-            )
-
-        if any(value > 1 for value in self.mutation_strategies.values()):
-            raise InvalidProgramSearchArgumentValue(
-                f"all mutation_strategies values must be <= 1. current values: {self.mutation_strategies}."
-            )
+        _validate_program_search_args(
+            min_program_statements=self.min_program_statements,
+            max_program_statements=self.max_program_statements,
+            pop_size=self.pop_size,
+            fitness_cache_size=self.fitness_cache_size,
+            mutation_strategies=self.mutation_strategies,
+        )
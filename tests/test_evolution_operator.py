@@ -0,0 +1,195 @@
+import random
+import unittest
+
+from program_searcher.evolution_operator import (
+    FitnessProportionateSelectionOperator,
+    FullPopulationMutationOperator,
+    _FenwickTree,
+)
+from program_searcher.mutation_strategy import MutationStrategy
+from program_searcher.program_model import Program, Statement
+
+
+class CountingMutationStrategy(MutationStrategy):
+    def __init__(self):
+        self.mutated = []
+
+    def mutate(self, program: Program):
+        self.mutated.append(program)
+
+
+def make_population(size):
+    population = []
+    for _ in range(size):
+        prog = Program(program_name="dummy", program_arg_names=["X"])
+        prog.insert_statement(Statement(args=["X"], func="negate"))
+        population.append(prog)
+    return population
+
+
+class TestFullPopulationMutationOperator(unittest.TestCase):
+    def setUp(self):
+        random.seed(42)
+        self.operator = FullPopulationMutationOperator()
+
+    def test_single_strategy_mutates_every_program(self):
+        strategy = CountingMutationStrategy()
+        population = make_population(5)
+
+        self.operator.apply(population, {}, {strategy: 1.0})
+
+        self.assertEqual(strategy.mutated, population)
+
+    def test_zero_weight_strategy_is_never_chosen(self):
+        used = CountingMutationStrategy()
+        unused = CountingMutationStrategy()
+        population = make_population(20)
+
+        self.operator.apply(population, {}, {used: 1.0, unused: 0.0})
+
+        self.assertEqual(len(used.mutated), 20)
+        self.assertEqual(unused.mutated, [])
+
+    def test_strategies_cache_follows_new_mapping(self):
+        first = CountingMutationStrategy()
+        second = CountingMutationStrategy()
+        population = make_population(3)
+
+        self.operator.apply(population, {}, {first: 1.0})
+        self.operator.apply(population, {}, {second: 1.0})
+
+        self.assertEqual(len(first.mutated), 3)
+        self.assertEqual(len(second.mutated), 3)
+
+
+class TestFenwickTree(unittest.TestCase):
+    def test_sample_follows_cumulative_weights(self):
+        tree = _FenwickTree([1.0, 0.0, 2.0, 3.0])
+
+        self.assertEqual(tree.total, 6.0)
+        self.assertEqual(tree.sample(0.0), 0)
+        self.assertEqual(tree.sample(0.99), 0)
+        self.assertEqual(tree.sample(1.0), 2)
+        self.assertEqual(tree.sample(2.99), 2)
+        self.assertEqual(tree.sample(3.0), 3)
+        self.assertEqual(tree.sample(5.99), 3)
+
+    def test_update_changes_weights_and_total(self):
+        tree = _FenwickTree([1.0, 2.0, 3.0])
+
+        tree.update(2, 0.0)
+        self.assertEqual(tree.total, 3.0)
+        self.assertEqual(tree.sample(2.99), 1)
+
+        tree.update(0, 5.0)
+        self.assertEqual(tree.total, 7.0)
+        self.assertEqual(tree.sample(4.99), 0)
+        self.assertEqual(tree.sample(5.0), 1)
+
+    def test_zeroing_all_weights_clears_total(self):
+        tree = _FenwickTree([0.1, 0.2, 0.3])
+
+        for i in range(3):
+            tree.update(i, 0.0)
+
+        self.assertEqual(tree.positive_count, 0)
+        self.assertEqual(tree.total, 0.0)
+
+    def test_sample_skips_zeroed_weights_despite_drift(self):
+        tree = _FenwickTree([0.1, 0.7, 0.2])
+        tree.update(1, 0.0)
+        tree.update(2, 0.0)
+
+        self.assertEqual(tree.positive_count, 1)
+        for u in (0.0, 0.05, 0.0999999, tree.total):
+            self.assertEqual(tree.sample(u), 0)
+
+
+class TestFitnessProportionateSelectionOperator(unittest.TestCase):
+    def setUp(self):
+        random.seed(42)
+
+    def test_children_replace_oldest_programs(self):
+        strategy = CountingMutationStrategy()
+        population = make_population(4)
+        original = list(population)
+        fitnesses = {id(prog): float(i) for i, prog in enumerate(population)}
+        operator = FitnessProportionateSelectionOperator(offspring_count=2)
+
+        operator.apply(population, fitnesses, {strategy: 1.0})
+
+        self.assertEqual(len(population), 4)
+        self.assertEqual(population[2:], original[2:])
+        self.assertEqual(population[:2], strategy.mutated)
+        self.assertNotIn(id(original[0]), fitnesses)
+        self.assertNotIn(id(original[1]), fitnesses)
+
+    def test_worst_program_is_never_selected(self):
+        strategy = CountingMutationStrategy()
+        worst, best = make_population(2)
+        best.insert_statement(Statement(args=["x1"], func="negate"))
+        population = []
+        operator = FitnessProportionateSelectionOperator()
+
+        for _ in range(10):
+            population[:] = [worst, best]
+            fitnesses = {id(worst): -10.0, id(best): 5.0}
+            operator.apply(population, fitnesses, {strategy: 1.0})
+
+        for child in strategy.mutated:
+            self.assertEqual(child.to_hash(), best.to_hash())
+            self.assertIsNot(child, best)
+
+    def test_non_finite_fitness_is_never_selected(self):
+        strategy = CountingMutationStrategy()
+        population = make_population(5)
+        best = population[3]
+        best.insert_statement(Statement(args=["x1"], func="negate"))
+        fitnesses = {
+            id(population[0]): float("nan"),
+            id(population[1]): float("-inf"),
+            id(population[2]): float("inf"),
+            id(best): 1.0,
+            id(population[4]): 0.0,
+        }
+        operator = FitnessProportionateSelectionOperator(offspring_count=3)
+
+        operator.apply(population, fitnesses, {strategy: 1.0})
+
+        self.assertEqual(len(strategy.mutated), 3)
+        for child in strategy.mutated:
+            self.assertEqual(child.to_hash(), best.to_hash())
+
+    def test_weights_tree_is_kept_between_steps(self):
+        strategy = CountingMutationStrategy()
+        population = make_population(4)
+        fitnesses = {id(prog): float(i) for i, prog in enumerate(population)}
+        operator = FitnessProportionateSelectionOperator()
+
+        operator.apply(population, fitnesses, {strategy: 1.0})
+        tree = operator._tree
+        fitnesses[id(population[0])] = 10.0
+        operator.apply(population, fitnesses, {strategy: 1.0})
+
+        self.assertIs(operator._tree, tree)
+        self.assertEqual(tree.total, 10.0 + 2.0 + 3.0 - 0.0)
+
+    def test_weights_tree_is_rebuilt_after_external_change(self):
+        strategy = CountingMutationStrategy()
+        population = make_population(4)
+        fitnesses = {id(prog): float(i) for i, prog in enumerate(population)}
+        operator = FitnessProportionateSelectionOperator()
+
+        operator.apply(population, fitnesses, {strategy: 1.0})
+        tree = operator._tree
+        fitnesses[id(population[0])] = 1.0
+        replacement = make_population(1)[0]
+        population[3] = replacement
+        fitnesses[id(replacement)] = 2.0
+        operator.apply(population, fitnesses, {strategy: 1.0})
+
+        self.assertIsNot(operator._tree, tree)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,32 +9,41 @@ from program_searcher.mutation_strategy import (
 from program_searcher.program_model import Program, Statement
 
 
-def make_program_with_return():
+def _build_program_no_return():
     prog = Program(program_name="dummy", program_arg_names=["X", "y"])
     prog.insert_statement(Statement(args=["X", "y"], func="add"))  # x1
     prog.insert_statement(Statement(args=["x1", "y"], func="substract"))  # x2
     prog.insert_statement(Statement(args=["x2", "x1"], func="divide"))  # x3
+    return prog
+
+
+def _build_program_with_return():
+    prog = _build_program_no_return()
     prog.insert_statement(Statement(args=["x3"], func="return"))
     return prog
 
 
+_PROGRAM_NO_RETURN = _build_program_no_return()
+_PROGRAM_WITH_RETURN = _build_program_with_return()
+
+
+def make_program_with_return():
+    return _PROGRAM_WITH_RETURN.copy()
+
+
 def make_program_no_return():
-    prog = Program(program_name="dummy", program_arg_names=["X", "y"])
-    prog.insert_statement(Statement(args=["X", "y"], func="add"))  # x1
-    prog.insert_statement(Statement(args=["x1", "y"], func="substract"))  # x2
-    prog.insert_statement(Statement(args=["x2", "x1"], func="divide"))  # x3
-    return prog
+    return _PROGRAM_NO_RETURN.copy()
 
 
 class TestRemoveStatementMutationStrategy(unittest.TestCase):
     def setUp(self):
-        random.seed(42)
-        self.sut = RemoveStatementMutationStrategy(remove_retries=3)
+        self.rng = random.Random(42)
+        self.sut = RemoveStatementMutationStrategy(remove_retries=3, rng=self.rng)
 
     def test_remove_simple_statement(self):
         prog = make_program_no_return()
         len_pr_before = len(prog)
-        strat = RemoveStatementMutationStrategy(remove_retries=3)
+        strat = RemoveStatementMutationStrategy(remove_retries=3, rng=self.rng)
 
         strat.mutate(prog)
 
@@ -42,11 +51,11 @@ class TestRemoveStatementMutationStrategy(unittest.TestCase):
 
     def test_does_not_remove_return_statement(self):
         prog = make_program_with_return()
-        strat = RemoveStatementMutationStrategy(remove_retries=3)
+        strat = RemoveStatementMutationStrategy(remove_retries=3, rng=self.rng)
 
         strat.mutate(prog)
 
-        self.assertTrue(any(stmt.func == "return" for stmt in prog._statements))
+        self.assertTrue(prog.has_return_statement())
 
     def test_dependency_blocks_removal(self):
         prog = Program(program_name="dummy", program_arg_names=["X"])
@@ -74,19 +83,21 @@ class TestRemoveStatementMutationStrategy(unittest.TestCase):
         after = len(prog)
 
         self.assertEqual(before, after)
-        self.assertTrue(all(stmt.func == "return" for stmt in prog._statements))
+        self.assertTrue(prog.has_return_statement())
 
 
 class TestReplaceStatementMutationStrategy(unittest.TestCase):
     def setUp(self):
-        random.seed(42)
+        self.rng = random.Random(42)
         self.available_functions = {
             "add": 2,
             "substract": 2,
             "divide": 2,
             "negate": 1,
         }
-        self.strategy = ReplaceStatementMutationStrategy(self.available_functions)
+        self.strategy = ReplaceStatementMutationStrategy(
+            self.available_functions, rng=self.rng
+        )
 
     def test_replaces_function_and_args(self):
         prog = make_program_no_return()
@@ -109,7 +120,7 @@ class TestReplaceStatementMutationStrategy(unittest.TestCase):
         prog = make_program_with_return()
         self.strategy.mutate(prog)
 
-        self.assertTrue(any(stmt.func == "return" for stmt in prog._statements))
+        self.assertTrue(prog.has_return_statement())
 
     def test_only_return_program_remains_unchanged(self):
         prog = Program(program_name="dummy", program_arg_names=["X"])
@@ -129,38 +140,38 @@ class TestReplaceStatementMutationStrategy(unittest.TestCase):
 
 class TestUpdateStatementArgsMutationStrategy(unittest.TestCase):
     def setUp(self):
-        random.seed(42)
-        self.strategy = UpdateStatementArgsMutationStrategy()
+        self.rng = random.Random(42)
+        self.strategy = UpdateStatementArgsMutationStrategy(rng=self.rng)
 
     def test_arguments_are_replaced(self):
         prog = make_program_no_return()
-        original_args = [stmt.args[:] for stmt in prog._statements]
+        stmts = prog._statements
+        original_args = [stmt.args for stmt in stmts]
 
         self.strategy.mutate(prog)
 
-        for orig, stmt in zip(original_args, prog._statements):
+        for orig, stmt in zip(original_args, stmts):
             self.assertEqual(len(orig), len(stmt.args))
 
-        for stmt in prog._statements:
+        for stmt in stmts:
             for arg in stmt.args:
                 self.assertIn(arg, prog.variables)
 
     def test_single_statement_updated(self):
         prog = make_program_no_return()
-        original_args = [stmt.args[:] for stmt in prog._statements]
+        stmts = prog._statements
+        original_args = [stmt.args for stmt in stmts]
 
         self.strategy.mutate(prog)
 
         self.assertTrue(
-            any(
-                orig != stmt.args for orig, stmt in zip(original_args, prog._statements)
-            )
+            any(orig != stmt.args for orig, stmt in zip(original_args, stmts))
         )
 
     def test_return_statement_can_be_updated(self):
         prog = make_program_with_return()
         return_stmt_index = len(prog._statements) - 1
-        original_args = prog.get_statement(return_stmt_index).args[:]
+        original_args = prog.get_statement(return_stmt_index).args
 
         self.strategy.mutate(prog)
 
@@ -168,21 +179,40 @@ class TestUpdateStatementArgsMutationStrategy(unittest.TestCase):
             len(original_args), len(prog.get_statement(return_stmt_index).args)
         )
 
+    def test_same_rng_seed_gives_same_mutations(self):
+        first = make_program_no_return()
+        second = make_program_no_return()
+        first_strategy = UpdateStatementArgsMutationStrategy(rng=random.Random(7))
+        second_strategy = UpdateStatementArgsMutationStrategy(rng=random.Random(7))
+
+        for _ in range(10):
+            first_strategy.mutate(first)
+            second_strategy.mutate(second)
+
+        self.assertEqual(first.to_canonical_key(), second.to_canonical_key())
+
     def test_empty_program_no_crash(self):
         prog = Program(program_name="dummy", program_arg_names=["X"])
         self.strategy.mutate(prog)
         self.assertEqual(len(prog), 0)
 
+    def test_statement_does_not_reference_own_result(self):
+        for _ in range(50):
+            prog = make_program_no_return()
+            self.strategy.mutate(prog)
+
+            for stmt in prog._statements:
+                self.assertNotIn(stmt.result_var_name, stmt.args)
+
     def test_at_least_one_statement_args_changed(self):
         prog = make_program_no_return()
-        original_args = [stmt.args[:] for stmt in prog._statements]
+        stmts = prog._statements
+        original_args = [stmt.args for stmt in stmts]
 
         self.strategy.mutate(prog)
 
         self.assertTrue(
-            any(
-                orig != stmt.args for orig, stmt in zip(original_args, prog._statements)
-            ),
+            any(orig != stmt.args for orig, stmt in zip(original_args, stmts)),
             "Żaden statement nie zmienił argumentów",
         )
 
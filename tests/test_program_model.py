@@ -1,13 +1,19 @@
+import random
 import unittest
 
 import networkx as nx
 
 from program_searcher.exceptions import (
     ExecuteProgramError,
+    InsertStatementError,
     RemoveStatementError,
     UpdateStatementArgumentsError,
 )
-from program_searcher.program_model import Program, Statement
+from program_searcher.program_model import (
+    Program,
+    RandomStatementGenerator,
+    Statement,
+)
 
 
 class TestStatement(unittest.TestCase):
@@ -36,6 +42,31 @@ class TestStatement(unittest.TestCase):
         stmt6.set_result_var_name("X")
         self.assertEqual(stmt6.to_code(), "X=get_data()")
 
+    def test_to_code_reflects_updated_fields(self):
+        prog = Program("test_program", ["a", "b"])
+        stmt = Statement(args=["a", "b"], func="add")
+        prog.insert_statement(stmt)
+        self.assertEqual(stmt.to_code(), "x1=add(a, b)")
+
+        prog.update_statment_args(0, ["b", "a"])
+        self.assertEqual(stmt.to_code(), "x1=add(b, a)")
+
+        prog.update_statement_full(0, "mult", ["b", "a"])
+        self.assertEqual(stmt.to_code(), "x1=mult(b, a)")
+
+        stmt.set_result_var_name("d")
+        self.assertEqual(stmt.to_code(), "d=mult(b, a)")
+
+    def test_fields_are_read_only(self):
+        stmt = Statement(args=["a", "b"], func="add")
+
+        with self.assertRaises(AttributeError):
+            stmt.args = ["b", "a"]
+        with self.assertRaises(AttributeError):
+            stmt.func = "mult"
+        with self.assertRaises(AttributeError):
+            stmt.result_var_name = "c"
+
     def test_is_equivalent(self):
         stmt1 = Statement(args=["x", "y"], func="add")
         stmt2 = Statement(args=["x", "y"], func="add")
@@ -51,6 +82,23 @@ class TestStatement(unittest.TestCase):
         self.assertFalse(stmt2.is_equivalent(stmt3))
 
 
+class TestRandomStatementGenerator(unittest.TestCase):
+    def test_random_statement_matches_function_arity(self):
+        generator = RandomStatementGenerator({"add": 2, "get_data": 0})
+        rng = random.Random(42)
+
+        for _ in range(20):
+            stmt = generator.random_statement(["a", "b"], rng)
+            expected_args_count = 2 if stmt.func == "add" else 0
+            self.assertEqual(len(stmt.args), expected_args_count)
+            self.assertTrue(set(stmt.args) <= {"a", "b"})
+
+    def test_random_args_without_arguments_is_empty_tuple(self):
+        generator = RandomStatementGenerator({"get_data": 0})
+
+        self.assertEqual(generator.random_args(["a"], 0), ())
+
+
 class TestProgram(unittest.TestCase):
     def setUp(self):
         self.prog = Program("test_program", ["a", "b"])
@@ -69,6 +117,21 @@ class TestProgram(unittest.TestCase):
 
         self.assertTrue(self.prog.has_return_statement())
 
+    def test_remove_return_statement_clears_return_flag(self):
+        self.prog.insert_statement(Statement(["a"], Statement.RETURN_KEYWORD))
+        self.prog.remove_statement(0)
+
+        self.assertFalse(self.prog.has_return_statement())
+
+    def test_update_statement_full_tracks_return_flag(self):
+        self.prog.insert_statement(Statement(["a", "b"], "add"))
+
+        self.prog.update_statement_full(0, Statement.RETURN_KEYWORD, ["a"])
+        self.assertTrue(self.prog.has_return_statement())
+
+        self.prog.update_statement_full(0, "add", ["a", "b"])
+        self.assertFalse(self.prog.has_return_statement())
+
     def test_update_statement_full_updates_func_and_args(self):
         stmt = Statement(["a", "b"], "add")
         self.prog.insert_statement(stmt)
@@ -79,7 +142,7 @@ class TestProgram(unittest.TestCase):
 
         updated_stmt = self.prog._statements[0]
         self.assertEqual(updated_stmt.func, new_func)
-        self.assertEqual(updated_stmt.args, new_args)
+        self.assertEqual(updated_stmt.args, tuple(new_args))
 
     def test_update_statement_full_empty_program_raises(self):
         with self.assertRaises(RemoveStatementError):
@@ -106,12 +169,42 @@ class TestProgram(unittest.TestCase):
         with self.assertRaises(RemoveStatementError):
             self.prog.remove_statement(0)
 
+    def test_remove_statement_allowed_after_reference_updated(self):
+        stmt1 = Statement(["a", "b"], "add")
+        self.prog.insert_statement(stmt1)
+        stmt2 = Statement([stmt1.result_var_name], "neg")
+        self.prog.insert_statement(stmt2)
+
+        self.prog.update_statment_args(1, ["a"])
+        self.prog.remove_statement(0)
+
+        self.assertEqual(self.prog._statements, [stmt2])
+
+    def test_insert_statement_owned_by_other_program_raises(self):
+        stmt = Statement(["a"], "neg")
+        self.prog.insert_statement(stmt)
+        other = Program("other", ["a"])
+
+        with self.assertRaises(InsertStatementError):
+            other.insert_statement(stmt)
+        self.assertEqual(self.prog.variables, ["a", "b", stmt.result_var_name])
+
+    def test_removed_statement_can_be_inserted_again(self):
+        stmt = Statement(["a"], "neg")
+        self.prog.insert_statement(stmt)
+        self.prog.remove_statement(0)
+        other = Program("other", ["a"])
+
+        other.insert_statement(stmt)
+
+        self.assertEqual(other._statements, [stmt])
+
     def test_update_statement_args_success(self):
         stmt = Statement(["a", "b"], "add")
         self.prog.insert_statement(stmt)
 
         self.prog.update_statment_args(0, ["c", "d"])
-        self.assertEqual(self.prog._statements[0].args, ["c", "d"])
+        self.assertEqual(self.prog._statements[0].args, ("c", "d"))
 
     def test_update_statement_args_wrong_length(self):
         stmt = Statement(["a", "b"], "add")
@@ -129,6 +222,51 @@ class TestProgram(unittest.TestCase):
         self.assertIn("def test_program(a, b):", code)
         self.assertIn("add", code)
 
+    def test_program_str_is_regenerated_after_modification(self):
+        self.prog.insert_statement(Statement(["a", "b"], "add"))
+        code = self.prog.program_str
+
+        self.assertIs(self.prog.program_str, code)
+
+        self.prog.update_statement_full(0, "sub", ["a", "b"])
+
+        self.assertIn("sub(a, b)", self.prog.program_str)
+        self.assertNotIn("add", self.prog.program_str)
+
+    def test_execute_reuses_compiled_code_until_regenerated(self):
+        self.prog.insert_statement(Statement(["a", "b"], "add"))
+        self.prog.generate_code()
+        global_args = {"add": lambda x, y: x + y, "sub": lambda x, y: x - y}
+
+        self.assertEqual(self.prog.execute({"a": 3, "b": 2}, global_args), 5)
+        compiled_code = self.prog._compiled_code
+        self.assertEqual(self.prog.execute({"a": 1, "b": 1}, global_args), 2)
+        self.assertIs(self.prog._compiled_code, compiled_code)
+
+        self.prog.update_statement_full(0, "sub", ["a", "b"])
+        self.prog.generate_code()
+
+        self.assertEqual(self.prog.execute({"a": 3, "b": 2}, global_args), 1)
+        self.assertIsNot(self.prog._compiled_code, compiled_code)
+
+    def test_execute_invalid_arguments_raises(self):
+        self.prog.insert_statement(Statement(["a", "b"], "add"))
+        self.prog.generate_code()
+
+        with self.assertRaises(ExecuteProgramError):
+            self.prog.execute({"a": 1})
+        with self.assertRaises(ExecuteProgramError):
+            self.prog.execute({"a": 1, "b": 2, "c": 3})
+
+    def test_to_python_func_returns_program_function(self):
+        self.prog.insert_statement(Statement(["a", "b"], "add"))
+
+        func = self.prog.to_python_func({"add": lambda x, y: x + y})
+
+        self.assertEqual(func.__name__, "test_program")
+        self.assertEqual(func(3, 2), 5)
+        self.assertEqual(func(a=1, b=1), 2)
+
     def test_abstract_execution_valid(self):
         stmt = Statement(["a", "b"], "add")
         self.prog.insert_statement(stmt)
@@ -148,6 +286,27 @@ class TestProgram(unittest.TestCase):
         with self.assertRaises(ExecuteProgramError):
             self.prog.abstract_execution(allowed)
 
+    def test_abstract_execution_revalidates_modified_statement(self):
+        stmt = Statement(["a", "b"], "add")
+        self.prog.insert_statement(stmt)
+        self.prog.insert_statement(Statement([stmt.result_var_name], "return"))
+        allowed = {"add": 2, "return": 1}
+        self.prog.abstract_execution(allowed)
+
+        self.prog.update_statment_args(0, ["a", "z"])
+
+        with self.assertRaises(ExecuteProgramError):
+            self.prog.abstract_execution(allowed)
+
+    def test_abstract_execution_revalidates_for_other_allowed_func(self):
+        stmt = Statement(["a", "b"], "add")
+        self.prog.insert_statement(stmt)
+        self.prog.insert_statement(Statement([stmt.result_var_name], "return"))
+        self.prog.abstract_execution({"add": 2, "return": 1})
+
+        with self.assertRaises(ExecuteProgramError):
+            self.prog.abstract_execution({"neg": 1, "return": 1})
+
     def test_abstract_execution_wrong_arg_count(self):
         stmt = Statement(["a", "b"], "neg")
         self.prog.insert_statement(stmt)
@@ -173,6 +332,58 @@ class TestProgram(unittest.TestCase):
 
         self.assertEqual(prog1.to_hash(), prog2.to_hash())
 
+    def test_to_hash_changes_after_modification(self):
+        self.prog.insert_statement(Statement(["a", "b"], "add"))
+        before = self.prog.to_hash()
+
+        self.prog.update_statment_args(0, ["b", "a"])
+
+        self.assertNotEqual(before, self.prog.to_hash())
+
+    def test_statement_update_invalidates_caches(self):
+        self.prog.insert_statement(Statement(["a", "b"], "add"))
+        self.prog.insert_statement(Statement(["a", "b"], "add"))
+        self.prog.abstract_execution({"add": 2})
+        program_str = self.prog.program_str
+        program_hash = self.prog.to_hash()
+        canonical_key = self.prog.to_canonical_key()
+
+        self.prog.update_statement_full(1, "mult", ["a", "b"])
+
+        self.assertNotEqual(self.prog.program_str, program_str)
+        self.assertIn("mult(a, b)", self.prog.program_str)
+        self.assertNotEqual(self.prog.to_hash(), program_hash)
+        self.assertNotEqual(self.prog.to_canonical_key(), canonical_key)
+        with self.assertRaises(ExecuteProgramError):
+            self.prog.abstract_execution({"add": 2})
+
+    def test_caches_survive_insert_into_other_program(self):
+        stmt = Statement(["a", "b"], "add")
+        self.prog.insert_statement(stmt)
+        program_str = self.prog.program_str
+        program_hash = self.prog.to_hash()
+        other = Program("other", ["a", "b"])
+
+        with self.assertRaises(InsertStatementError):
+            other.insert_statement(stmt)
+
+        self.assertEqual(self.prog.program_str, program_str)
+        self.assertEqual(self.prog.to_hash(), program_hash)
+        self.assertEqual(self.prog._compute_hash(), program_hash)
+
+    def test_to_canonical_key_ignores_variable_names(self):
+        prog1 = Program("prog1", ["a"])
+        prog1.insert_statement(Statement(["a"], "neg"))
+        prog2 = Program("prog2", ["x"])
+        prog2.insert_statement(Statement(["x"], "neg"))
+
+        self.assertEqual(prog1.to_canonical_key(), (("neg", "in0", "v0"),))
+        self.assertEqual(prog1.to_canonical_key(), prog2.to_canonical_key())
+
+        prog2.update_statement_full(0, "abs", ["x"])
+
+        self.assertNotEqual(prog1.to_canonical_key(), prog2.to_canonical_key())
+
     def test_copy_creates_independent_program(self):
         stmt = Statement(["a", "b"], "add")
         self.prog.insert_statement(stmt)
@@ -181,6 +392,19 @@ class TestProgram(unittest.TestCase):
         self.assertNotEqual(id(self.prog), id(prog_copy))
         self.assertNotEqual(id(self.prog._statements[0]), id(prog_copy._statements[0]))
 
+    def test_copy_keeps_return_vars_count_and_independent_state(self):
+        prog = Program("test_program", ["a", "b"], return_vars_count=2)
+        prog.insert_statement(Statement(["a", "b"], "add"))
+        prog_copy = prog.copy()
+
+        prog_copy.insert_statement(Statement(["a"], "neg"))
+
+        self.assertEqual(prog_copy.return_vars_count, 2)
+        self.assertEqual(len(prog), 1)
+        self.assertEqual(prog.variables, ["a", "b", "x1"])
+        self.assertEqual(prog_copy.variables, ["a", "b", "x1", "x2"])
+        self.assertNotEqual(prog.to_hash(), prog_copy.to_hash())
+
     def test_generate_graph_should_raise_when_no_return(self):
         with self.assertRaises(ExecuteProgramError):
             self.prog.generate_graph()
@@ -1,9 +1,11 @@
+import csv
 import logging
+import math
 import os
 import random
-import sys
 import tempfile
 import unittest
+from types import MappingProxyType
 
 from program_searcher.evolution_operator import FullPopulationMutationOperator
 from program_searcher.exceptions import InvalidProgramSearchArgumentValue
@@ -15,120 +17,169 @@ from program_searcher.mutation_strategy import (
     UpdateStatementArgsMutationStrategy,
 )
 from program_searcher.program_model import Program, Statement, WarmStartProgram
-from program_searcher.program_search import ProgramSearch
+from program_searcher.program_search import (
+    ProgramSearch,
+    _validate_program_search_args,
+)
 from program_searcher.stop_condition import MaxStepsStopCondition
 
+# The full-size search configuration is slow; set RUN_SLOW=1 to run it.
+RUN_SLOW = bool(os.environ.get("RUN_SLOW"))
+SEARCH_POP_SIZE = 50 if RUN_SLOW else 20
+SEARCH_MAX_STEPS = 100 if RUN_SLOW else 20
 
-class TestProgramSearchValidation(unittest.TestCase):
-    def setUp(self):
-        self.correct_args = {
-            "program_name": "test_program",
-            "program_arg_names": ["x"],
-            "return_program_var_count": 1,
-            "available_functions": {"add": 2},
-            "min_program_statements": 1,
-            "max_program_statements": 5,
-            "stop_condition": MockStopCondition(),
-            "evaluate_program_func": lambda p: 0.0,
-            "config": {
-                "pop_size": 10,
-                "mutation_strategies": {
-                    RemoveStatementMutationStrategy: 0.3,
-                    ReplaceStatementMutationStrategy: 0.3,
-                    UpdateStatementArgsMutationStrategy: 0.4,
-                },
-                "logger": logging.getLogger("test_logger"),
-            },
-        }
+SILENT_LOGGER = logging.getLogger("program_searcher_test")
+SILENT_LOGGER.addHandler(logging.NullHandler())
+SILENT_LOGGER.propagate = False
+SILENT_LOGGER.setLevel(logging.CRITICAL + 1)
 
-    def test_min_greater_than_max(self):
-        args = self.correct_args.copy()
-        args["min_program_statements"] = 6
-        args["max_program_statements"] = 5
-        with self.assertRaises(InvalidProgramSearchArgumentValue):
-            ProgramSearch(**args)
 
-    def test_negative_pop_size(self):
-        args = self.correct_args.copy()
-        args["config"]["pop_size"] = -1
-        with self.assertRaises(InvalidProgramSearchArgumentValue):
-            ProgramSearch(**args)
+class MockStopCondition:
+    __slots__ = ()
 
-    def test_invalid_mutation_strategies_sum(self):
-        args = self.correct_args.copy()
-        args["config"]["mutation_strategies"] = {
-            ReplaceStatementMutationStrategy: 0.5,
-            RemoveStatementMutationStrategy: 0.5,
-            UpdateStatementArgsMutationStrategy: 0.5,
-        }
-        with self.assertRaises(InvalidProgramSearchArgumentValue):
-            ProgramSearch(**args)
+    def is_met(self):
+        return True
 
-    def test_mutation_strategies_negative_value(self):
-        args = self.correct_args.copy()
-        args["config"]["mutation_strategies"] = {
-            RemoveStatementMutationStrategy: -0.1,
-            ReplaceStatementMutationStrategy: 0.6,
-            UpdateStatementArgsMutationStrategy: 0.5,
-        }
-        with self.assertRaises(InvalidProgramSearchArgumentValue):
-            ProgramSearch(**args)
+    def step(self):
+        pass
+
+
+MOCK_STOP_CONDITION = MockStopCondition()
 
-    def test_mutation_strategies_value_greater_than_one(self):
-        args = self.correct_args.copy()
-        args["config"]["mutation_strategies"] = {
-            RemoveStatementMutationStrategy: 1.1,
-            ReplaceStatementMutationStrategy: -0.05,
-            UpdateStatementArgsMutationStrategy: -0.05,
-        }
+VALID_MUTATION_STRATEGIES = MappingProxyType(
+    {
+        RemoveStatementMutationStrategy: 0.3,
+        ReplaceStatementMutationStrategy: 0.3,
+        UpdateStatementArgsMutationStrategy: 0.4,
+    }
+)
+
+VALID_VALIDATION_ARGS = MappingProxyType(
+    {
+        "min_program_statements": 1,
+        "max_program_statements": 5,
+        "pop_size": 10,
+        "fitness_cache_size": 80,
+        "mutation_strategies": VALID_MUTATION_STRATEGIES,
+    }
+)
+
+INVALID_SCALAR_ARGS = [
+    {"min_program_statements": 6, "max_program_statements": 5},
+    {"pop_size": -1},
+    {"fitness_cache_size": -1},
+]
+
+INVALID_MUTATION_STRATEGIES = [
+    {
+        ReplaceStatementMutationStrategy: 0.5,
+        RemoveStatementMutationStrategy: 0.5,
+        UpdateStatementArgsMutationStrategy: 0.5,
+    },
+    {
+        RemoveStatementMutationStrategy: -0.1,
+        ReplaceStatementMutationStrategy: 0.6,
+        UpdateStatementArgsMutationStrategy: 0.5,
+    },
+    {
+        RemoveStatementMutationStrategy: 1.1,
+        ReplaceStatementMutationStrategy: -0.05,
+        UpdateStatementArgsMutationStrategy: -0.05,
+    },
+    {
+        RemoveStatementMutationStrategy: 2.0,
+        ReplaceStatementMutationStrategy: -0.5,
+        UpdateStatementArgsMutationStrategy: -0.5,
+    },
+    {
+        RemoveStatementMutationStrategy: float("inf"),
+        ReplaceStatementMutationStrategy: 0.5,
+        UpdateStatementArgsMutationStrategy: 0.5,
+    },
+    {
+        RemoveStatementMutationStrategy: float("nan"),
+        ReplaceStatementMutationStrategy: 0.5,
+        UpdateStatementArgsMutationStrategy: 0.5,
+    },
+]
+
+
+class TestProgramSearchValidation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.correct_args = MappingProxyType(
+            {
+                "program_name": "test_program",
+                "program_arg_names": ["x"],
+                "return_program_var_count": 1,
+                "available_functions": MappingProxyType({"add": 2}),
+                "min_program_statements": 1,
+                "max_program_statements": 5,
+                "stop_condition": MOCK_STOP_CONDITION,
+                "evaluate_program_func": lambda p: 0.0,
+                "config": MappingProxyType(
+                    {
+                        "pop_size": 10,
+                        "mutation_strategies": VALID_MUTATION_STRATEGIES,
+                        "logger": SILENT_LOGGER,
+                    }
+                ),
+            }
+        )
+
+    def test_valid_arguments(self):
+        _validate_program_search_args(**VALID_VALIDATION_ARGS)
+        ProgramSearch(**self.correct_args)
+
+    def test_invalid_scalar_args(self):
+        for overrides in INVALID_SCALAR_ARGS:
+            with self.subTest(**overrides):
+                with self.assertRaises(InvalidProgramSearchArgumentValue):
+                    _validate_program_search_args(
+                        **{**VALID_VALIDATION_ARGS, **overrides}
+                    )
+
+    def test_invalid_mutation_strategies(self):
+        for mutation_strategies in INVALID_MUTATION_STRATEGIES:
+            with self.subTest(mutation_strategies=mutation_strategies):
+                with self.assertRaises(InvalidProgramSearchArgumentValue):
+                    _validate_program_search_args(
+                        **{
+                            **VALID_VALIDATION_ARGS,
+                            "mutation_strategies": mutation_strategies,
+                        }
+                    )
+
+    def test_invalid_arguments_raise_from_constructor(self):
+        args = {**self.correct_args, "config": {"pop_size": -1}}
         with self.assertRaises(InvalidProgramSearchArgumentValue):
             ProgramSearch(**args)
 
     def test_search_with_defaults_should_not_raise_any(self):
-        logger = logging.getLogger("program_searcher")
-        logger.handlers = []
-        logger.setLevel(logging.INFO)
-
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(logging.INFO)
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-
         program_search = ProgramSearch(
             program_name="test",
             program_arg_names=["a", "b"],
             return_program_var_count=1,
             available_functions=available_functions,
-            stop_condition=MaxStepsStopCondition(max_steps=100),
-            evaluate_program_func=eval_func,
+            stop_condition=MaxStepsStopCondition(max_steps=SEARCH_MAX_STEPS),
+            evaluate_program_func=make_eval_func(),
             min_program_statements=1,
             max_program_statements=5,
-            config={"pop_size": 50, "restart_steps": 10, "logger": logger},
+            config={
+                "pop_size": SEARCH_POP_SIZE,
+                "restart_steps": 10,
+                "logger": SILENT_LOGGER,
+            },
         )
 
         result_pr, result_fitness = program_search.search()
-        print(result_fitness)
-        print(result_pr.program_str)
+        self.assertTrue(math.isfinite(result_fitness))
+        compile(result_pr.program_str, "<result>", "exec")
 
     def test_search_should_not_raise_any(self):
         with tempfile.TemporaryDirectory() as tmpdir:
-            log_file = os.path.join(tmpdir, "program_search.log")
             csv_dir = tmpdir
 
-            logger = logging.getLogger("program_searcher")
-            logger.setLevel(logging.DEBUG)
-
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setLevel(logging.DEBUG)
-            formatter = logging.Formatter(
-                "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-            )
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-
             warm_start_program = Program(
                 program_name="test", program_arg_names=["a", "b"]
             )
@@ -154,40 +205,102 @@ class TestProgramSearchValidation(unittest.TestCase):
             }
 
             evolution_operator = FullPopulationMutationOperator()
+            csv_tracker = CsvStepsTracker(file_dir=csv_dir, save_batch_size=7)
 
             program_search = ProgramSearch(
                 program_name="test",
                 program_arg_names=["a", "b"],
                 return_program_var_count=1,
                 available_functions=available_functions,
-                stop_condition=MaxStepsStopCondition(max_steps=100),
-                evaluate_program_func=eval_func,
+                stop_condition=MaxStepsStopCondition(max_steps=SEARCH_MAX_STEPS),
+                evaluate_program_func=make_eval_func(),
                 min_program_statements=1,
                 max_program_statements=5,
                 config={
-                    "pop_size": 50,
+                    "pop_size": SEARCH_POP_SIZE,
                     "restart_steps": 15,
-                    "logger": logger,
+                    "logger": SILENT_LOGGER,
                     "mutation_strategies": mutation_strategies,
                     "warm_start_program": warm_start,
-                    "step_trackers": [
-                        CsvStepsTracker(file_dir=csv_dir, save_batch_size=5)
-                    ],
+                    "step_trackers": [csv_tracker],
                     "evolution_operator": evolution_operator,
                 },
             )
 
             result_pr, result_fitness = program_search.search()
-            print(result_fitness)
-            print(result_pr.program_str)
+            self.assertTrue(math.isfinite(result_fitness))
+            compile(result_pr.program_str, "<result>", "exec")
 
+            with open(csv_tracker.file_path, newline="") as f:
+                self.assertEqual(len(list(csv.reader(f))), SEARCH_MAX_STEPS + 1)
 
-class MockStopCondition:
-    def is_met(self):
-        return True
 
-    def step(self):
-        pass
+class TestProgramSearchLogging(unittest.TestCase):
+    def test_step_summary_is_logged(self):
+        logger = logging.getLogger("program_searcher_test.logging")
+        program_search = ProgramSearch(
+            program_name="test",
+            program_arg_names=["a", "b"],
+            return_program_var_count=1,
+            available_functions=available_functions,
+            stop_condition=MaxStepsStopCondition(max_steps=2),
+            evaluate_program_func=make_eval_func(),
+            min_program_statements=1,
+            max_program_statements=3,
+            config={"pop_size": 5, "logger": logger},
+        )
+
+        with self.assertLogs(logger, level=logging.INFO) as logs:
+            program_search.search()
+
+        step_logs = [line for line in logs.output if "Step:" in line]
+        self.assertEqual(len(step_logs), 2)
+
+
+class TestProgramSearchFitnessCache(unittest.TestCase):
+    def _run_search(self, config):
+        evaluated = []
+
+        def count_eval(program):
+            evaluated.append(program)
+            return 0.0
+
+        program_search = ProgramSearch(
+            program_name="test",
+            program_arg_names=["x"],
+            return_program_var_count=1,
+            available_functions={"add": 2},
+            stop_condition=MaxStepsStopCondition(max_steps=1),
+            evaluate_program_func=count_eval,
+            min_program_statements=1,
+            max_program_statements=1,
+            config={"pop_size": 10, **config},
+        )
+        program_search.search()
+        return evaluated
+
+    def test_equivalent_programs_are_evaluated_once(self):
+        evaluated = self._run_search({})
+        self.assertEqual(len(evaluated), 1)
+
+    def test_cache_can_be_disabled(self):
+        evaluated = self._run_search({"fitness_cache_size": 0})
+        self.assertEqual(len(evaluated), 10)
+
+    def test_population_is_evaluated_in_one_batch(self):
+        batches = []
+
+        def batch_eval(programs):
+            batches.append(programs)
+            return [0.0] * len(programs)
+
+        evaluated = self._run_search(
+            {"fitness_cache_size": 0, "evaluate_population_func": batch_eval}
+        )
+
+        self.assertEqual(evaluated, [])
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(len(batches[0]), 10)
 
 
 class Operations:
@@ -213,27 +326,42 @@ available_functions = {
 }
 
 
-def eval_func(program: Program):
-    tries = 50
-    errors = 0
-    for _ in range(tries):
-        rand_a = random.randint(1, 100)
-        rand_b = random.randint(1, 100)
+# Candidates whose running mean error exceeds twice the best mean error seen so
+# far are rejected early with their current mean error.
+def make_eval_func(tries: int = 50):
+    best_error = math.inf
+
+    def eval_func(program: Program):
+        nonlocal best_error
+        errors = 0
 
         try:
             program.abstract_execution(available_functions)
+        except Exception:
+            return -1_000_000
 
-            real_res = rand_a - rand_b + rand_a * rand_b
-            res = program.execute(
-                program_args={"a": rand_a, "b": rand_b}, global_args={"op": op}
-            )
+        for trial in range(1, tries + 1):
+            rand_a = random.randint(1, 100)
+            rand_b = random.randint(1, 100)
 
-            errors += abs(real_res - res)
+            try:
+                real_res = rand_a - rand_b + rand_a * rand_b
+                res = program.execute(
+                    program_args={"a": rand_a, "b": rand_b}, global_args={"op": op}
+                )
 
-        except Exception:
-            return -1_000_000
+                errors += abs(real_res - res)
+
+            except Exception:
+                return -1_000_000
+
+            if errors / trial > 2 * best_error:
+                return -errors / trial
+
+        best_error = min(best_error, errors / tries)
+        return -errors / tries
 
-    return -errors / tries
+    return eval_func
 
 
 if __name__ == "__main__":